@@ -1,16 +1,14 @@
 # results/compare_checkpoints.py
 import os
 import sys
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 import gymnasium as gym 
 import torch
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from collections import defaultdict
 
-sns.set(style="darkgrid")
-
 # Add the parent directory to sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
@@ -42,80 +40,99 @@ def print_versions():
     print(f"Gymnasium: {gym.__version__}")
     print("\n")
 
-# Add this right after imports
-print_versions()
 
+def build_model(algorithm, state_dim, action_dim):
+    """Create an untrained network for the given algorithm."""
+    if algorithm == 'DQN':
+        return DQNNetwork(state_dim, action_dim)
+    elif algorithm == 'DoubleDQN':
+        return DoubleDQNNetwork(state_dim, action_dim)
+    elif algorithm == 'DuelingDQN':
+        return DuelingDQNNetwork(state_dim, action_dim)
+    else:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
 
-def evaluate_checkpoint(model_path, env_name, algorithm, num_episodes=100):
-    """Evaluate a single checkpoint."""
+def load_weights(model, model_path):
+    """Load checkpoint weights into an existing model in place."""
+    # Load model with weights_only=True; mmap maps the zip checkpoint instead of reading it into memory
+    try:
+        state_dict = torch.load(model_path, map_location=torch.device('cpu'), mmap=True, weights_only=True)
+    except TypeError:
+        state_dict = torch.load(model_path, map_location=torch.device('cpu'))
+
+    # Strip the DataParallel prefix in one pass; keys without it are left untouched
+    state_dict = {k.removeprefix('module.'): v for k, v in state_dict.items()}
+
+    model.load_state_dict(state_dict, strict=True)
+    model.eval()
+
+def evaluate_checkpoint(model, env, num_episodes=100):
+    """Evaluate the weights currently loaded in model."""
+    rewards = np.empty(num_episodes, dtype=np.float32)
+    valid = 0
+    for episode in range(num_episodes):
+        try:
+            # Seeding each reset replays the same episodes for every checkpoint
+            state, _ = env.reset(seed=episode)
+            total_reward = 0
+            terminated = truncated = False
+
+            while not (terminated or truncated):
+                if state is None or (isinstance(state, np.ndarray) and state.size == 0):
+                    break
+
+                state_tensor = torch.from_numpy(np.asarray(state, dtype=np.float32)).unsqueeze(0)
+                with torch.no_grad():
+                    action = model(state_tensor).max(1)[1].item()
+
+                try:
+                    next_state, reward, terminated, truncated, _ = env.step(action)
+                    total_reward += reward
+                    state = next_state
+                except Exception as e:
+                    print(f"Error in step: {e}")
+                    break
+
+            rewards[valid] = total_reward
+            valid += 1
+        except Exception as e:
+            print(f"Error in episode {episode}: {e}")
+            continue
+
+    if valid:
+        rewards = rewards[:valid]
+        return rewards.mean(), rewards.std()
+    else:
+        return None, None
+
+def evaluate_algorithm(env_name, algorithm, model_paths, num_episodes=100):
+    """Evaluate all checkpoints of one algorithm, reusing a single environment and model."""
     try:
         # Create environment using gymnasium with v3
         env = gym.make(env_name, render_mode=None)
         state_dim = env.observation_space.shape[0]
         action_dim = env.action_space.n
+        model = build_model(algorithm, state_dim, action_dim)
+    except Exception as e:
+        print(f"Error setting up {algorithm}: {str(e)}")
+        return [(None, None)] * len(model_paths)
 
-        # Create and load model
-        if algorithm == 'DQN':
-            model = DQNNetwork(state_dim, action_dim)
-        elif algorithm == 'DoubleDQN':
-            model = DoubleDQNNetwork(state_dim, action_dim)
-        elif algorithm == 'DuelingDQN':
-            model = DuelingDQNNetwork(state_dim, action_dim)
-        else:
-            raise ValueError(f"Unknown algorithm: {algorithm}")
-
-        # Load model with weights_only=True
+    results = []
+    for model_path in model_paths:
+        print(f"Evaluating {model_path}...")
         try:
-            state_dict = torch.load(model_path, map_location=torch.device('cpu'), weights_only=True)
-        except TypeError:
-            state_dict = torch.load(model_path, map_location=torch.device('cpu'))
-
-        if 'module.' in list(state_dict.keys())[0]:
-            new_state_dict = {k.replace('module.', ''): v for k, v in state_dict.items()}
-            state_dict = new_state_dict
-
-        model.load_state_dict(state_dict)
-        model.eval()
-
-        # Evaluate
-        rewards = []
-        for episode in range(num_episodes):
-            try:
-                state, _ = env.reset()
-                total_reward = 0
-                terminated = truncated = False
-
-                while not (terminated or truncated):
-                    if state is None or (isinstance(state, np.ndarray) and state.size == 0):
-                        break
-
-                    state_tensor = torch.FloatTensor(state).unsqueeze(0)
-                    with torch.no_grad():
-                        action = model(state_tensor).max(1)[1].item()
-
-                    try:
-                        next_state, reward, terminated, truncated, _ = env.step(action)
-                        total_reward += reward
-                        state = next_state
-                    except Exception as e:
-                        print(f"Error in step: {e}")
-                        break
-
-                rewards.append(total_reward)
-            except Exception as e:
-                print(f"Error in episode {episode}: {e}")
-                continue
-
-        env.close()
-
-        if rewards:
-            return np.mean(rewards), np.std(rewards)
-        else:
-            return None, None
+            load_weights(model, model_path)
+            results.append(evaluate_checkpoint(model, env, num_episodes))
+        except Exception as e:
+            print(f"Error evaluating {model_path}: {str(e)}")
+            results.append((None, None))
 
-    except Exception as e:
-        print(f"Error evaluating {model_path}: {str(e)}")
-        return None, None
+    env.close()
+    return results
+
+def init_worker():
+    """Keep each evaluation process on one thread so workers do not oversubscribe the CPU."""
+    torch.set_num_threads(1)
 
 def collect_checkpoint_data(weights_dir):
     """Collect performance data for all checkpoints."""
@@ -126,32 +143,47 @@ def collect_checkpoint_data(weights_dir):
     print(f"Looking for checkpoints in folders named: {folder_name}")
     print(f"Using gym environment: {env_name}")
 
+    jobs = []
     for algo in os.listdir(weights_dir):
         algo_path = os.path.join(weights_dir, algo)
         if os.path.isdir(algo_path):
             # Use folder_name here instead of env_name
             env_path = os.path.join(algo_path, folder_name)
             if os.path.isdir(env_path):
-                print(f"\nEvaluating {algo} checkpoints for {folder_name}")
-
+                found = []
                 for checkpoint in checkpoints:
                     model_path = os.path.join(env_path, checkpoint)
                     if os.path.exists(model_path):
-                        print(f"Evaluating {checkpoint}...")
-                        # Pass env_name here for gym environment creation
-                        mean_reward, std_reward = evaluate_checkpoint(model_path, env_name, algo)
-
-                        if mean_reward is not None and std_reward is not None:
-                            data.append({
-                                'algorithm': algo,
-                                'checkpoint': checkpoint,
-                                'mean_reward': mean_reward,
-                                'std_reward': std_reward
-                            })
-                        else:
-                            print(f"Warning: Could not evaluate {algo} {checkpoint}")
+                        found.append((checkpoint, model_path))
                     else:
                         print(f"Checkpoint {checkpoint} not found in {env_path}")
+                if found:
+                    jobs.append((algo, found))
+
+    # Each algorithm is evaluated independently, so run them in separate processes; spawn
+    # avoids forking a process that has already initialised torch
+    max_workers = max(1, min(len(jobs), (os.cpu_count() or 2) // 2))
+    print(f"\nEvaluating {len(jobs)} algorithms for {folder_name} with {max_workers} worker processes")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context('spawn'), initializer=init_worker) as executor:
+        results = list(executor.map(
+            evaluate_algorithm,
+            # Pass env_name here for gym environment creation
+            [env_name] * len(jobs),
+            [algo for algo, _ in jobs],
+            [[model_path for _, model_path in found] for _, found in jobs]
+        ))
+
+    for (algo, found), algo_results in zip(jobs, results):
+        for (checkpoint, _), (mean_reward, std_reward) in zip(found, algo_results):
+            if mean_reward is not None and std_reward is not None:
+                data.append({
+                    'algorithm': algo,
+                    'checkpoint': checkpoint,
+                    'mean_reward': mean_reward,
+                    'std_reward': std_reward
+                })
+            else:
+                print(f"Warning: Could not evaluate {algo} {checkpoint}")
 
     if not data:
         print("\nNo valid checkpoint data collected!")
@@ -162,23 +194,26 @@ def collect_checkpoint_data(weights_dir):
 
     return pd.DataFrame(data)
 
+def import_pyplot(headless):
+    """Import matplotlib on first use so evaluation workers never load it."""
+    import matplotlib
+    if headless:
+        # Rendering straight to files needs no GUI backend
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set(style="darkgrid")
+    return plt
+
 def plot_checkpoint_comparison(df, save_path=None):
     """Create bar plot comparing checkpoint performances."""
-    plt.figure(figsize=(12, 6))
+    plt = import_pyplot(headless=save_path is not None)
+    fig, ax = plt.subplots(figsize=(12, 6))
     
-    # Create grouped bar plot
-    sns.barplot(data=df, x='algorithm', y='mean_reward', hue='checkpoint', ci=None)
-    
-    # Add error bars manually
-    for i, row in df.iterrows():
-        plt.errorbar(
-            x=i % len(df['algorithm'].unique()), 
-            y=row['mean_reward'], 
-            yerr=row['std_reward'], 
-            fmt='none', 
-            c='black', 
-            capsize=5
-        )
+    # Pivot once so each checkpoint is a bar series with its own error bars
+    means = df.pivot(index='algorithm', columns='checkpoint', values='mean_reward')
+    stds = df.pivot(index='algorithm', columns='checkpoint', values='std_reward')
+    means.plot(kind='bar', yerr=stds, capsize=5, rot=0, ax=ax)
     
     plt.title(f'Checkpoint Performance Comparison - {env_name}')
     plt.xlabel('Algorithm')
@@ -197,6 +232,7 @@ def plot_checkpoint_comparison(df, save_path=None):
 
 def plot_learning_progress(df, save_path=None):
     """Create line plot showing learning progress across checkpoints."""
+    plt = import_pyplot(headless=save_path is not None)
     plt.figure(figsize=(12, 6))
     
     # Convert checkpoint names to numeric values for plotting
@@ -249,6 +285,8 @@ def create_summary_table(df, save_path=None):
     return summary_table
 
 def main():
+    print_versions()
+
     # Set up paths
     weights_dir = os.path.join(current_dir, 'weights')
     plots_dir = os.path.join(current_dir, 'plots_images', f"{folder_name}_ENV")
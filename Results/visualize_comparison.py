@@ -73,7 +73,7 @@ def compute_metrics(df, window=50):
 
 def plot_rewards(df, save_path=None):
     plt.figure(figsize=(12, 8))
-    sns.lineplot(data=df, x='episode', y='reward_ma', hue='algorithm', ci='sd')
+    sns.lineplot(data=df, x='episode', y='reward_ma', hue='algorithm', errorbar='sd')
     plt.title('Comparison of Reward Moving Average Across Algorithms in Env: ' + env_name)
     plt.xlabel('Episode')
     plt.ylabel('Reward (Moving Average)')
@@ -89,7 +89,7 @@ def plot_rewards(df, save_path=None):
 
 def plot_epsilon(df, save_path=None):
     plt.figure(figsize=(12, 8))
-    sns.lineplot(data=df, x='episode', y='epsilon', hue='algorithm', ci=None)
+    sns.lineplot(data=df, x='episode', y='epsilon', hue='algorithm', errorbar=None)
     plt.title('Epsilon Decay Across Algorithms in Env: ' + env_name)
     plt.xlabel('Episode')
     plt.ylabel('Epsilon')
@@ -174,14 +174,14 @@ def plot_combined_metrics(df, save_path=None):
 
     # Plot Reward Moving Average
     sns.lineplot(data=df, x='episode', y='reward_ma',
-                 hue='algorithm', ax=axes[0, 0], ci='sd')
+                 hue='algorithm', ax=axes[0, 0], errorbar='sd')
     axes[0, 0].set_title(f'Reward Moving Average - {env_name}')
     axes[0, 0].set_xlabel('Episode')
     axes[0, 0].set_ylabel('Reward (Moving Average)')
 
     # Plot Epsilon Decay
     sns.lineplot(data=df, x='episode', y='epsilon',
-                 hue='algorithm', ax=axes[0, 1], ci=None)
+                 hue='algorithm', ax=axes[0, 1], errorbar=None)
     axes[0, 1].set_title(f'Epsilon Decay - {env_name}')
     axes[0, 1].set_xlabel('Episode')
     axes[0, 1].set_ylabel('Epsilon')
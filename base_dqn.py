@@ -1,12 +1,18 @@
 # base_dqn.py
 
-import random
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from memory import Memory
+from memory import ReplayBuffer
 from data import Data
 
+try:
+    from returns import compute_targets
+except ImportError:
+    # numba is optional; td_target falls back to the tensor expression without it
+    compute_targets = None
+
 class BaseDQN:
     def __init__(
         self,
@@ -20,8 +26,11 @@ class BaseDQN:
         batch_size=64,
         target_update=10,
         learning_rate=0.00025,
-        memory_capacity=10000
+        memory_capacity=10000,
+        use_compile=False
     ):
+        # Gymnasium reports space sizes as numpy integers, which TorchScript rejects as Linear constants
+        num_states, num_actions = int(num_states), int(num_actions)
         self.num_actions = num_actions
         self.gamma = gamma
         self.epsilon = epsilon
@@ -31,33 +40,64 @@ class BaseDQN:
         self.target_update = target_update
         self.learn_step_counter = 0
         self.memory_counter = 0
+        # Seeded from the global NumPy state so set_seed() keeps exploration reproducible
+        self._rng = np.random.default_rng(np.random.randint(2**31))
 
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # Page-locked host memory lets minibatch copies to the GPU run asynchronously
+        self.pin_memory = self.device.type == "cuda"
+        # Dynamo traces NumPy calls into tensors the fixed-signature Numba kernel cannot take,
+        # so the kernel is only used when the training step runs eagerly
+        self.use_numba_targets = compute_targets is not None and self.device.type == "cpu" and not use_compile
 
         self.eval_net = network_class(num_states, num_actions).to(self.device)
         self.target_net = network_class(num_states, num_actions).to(self.device)
+        if not use_compile:
+            # TorchScript removes per-layer Python dispatch, which dominates the batch-size-1
+            # forward in choose_action; the first few calls pay a one-time profiling warmup.
+            # torch.compile cannot trace into scripted modules, so keep them eager when compiling.
+            self.eval_net = torch.jit.script(self.eval_net)
+            self.target_net = torch.jit.script(self.target_net)
         self.target_net.load_state_dict(self.eval_net.state_dict())
         self.target_net.eval()
 
         self.optimizer = optim.Adam(self.eval_net.parameters(), lr=learning_rate)
         self.loss_func = nn.MSELoss()
 
-        self.memory = Memory(capacity=memory_capacity)
+        self.memory = ReplayBuffer(capacity=memory_capacity, state_size=num_states)
+
+        if use_compile:
+            # Only the batched update is compiled; choose_action stays eager so per-step
+            # inference never triggers recompilation. On small graphs this can be slower.
+            self._train_step = torch.compile(self._train_step, mode="reduce-overhead", fullgraph=False)
 
     def choose_action(self, state):
-        if random.random() > self.epsilon:
-            state = torch.tensor(state, dtype=torch.float).unsqueeze(0).to(self.device)
+        if self._rng.random() > self.epsilon:
+            state = torch.as_tensor(state, dtype=torch.float32, device=self.device).unsqueeze(0)
             with torch.no_grad():
                 q_values = self.eval_net(state)
             action = torch.argmax(q_values).item()
         else:
-            action = random.randint(0, self.num_actions - 1)
+            action = int(self._rng.integers(self.num_actions))
         return action
 
+    def choose_actions(self, states):
+        """Epsilon-greedy actions for a batch of states from parallel environments."""
+        states = torch.as_tensor(states, dtype=torch.float32, device=self.device)
+        with torch.no_grad():
+            greedy_actions = self.eval_net(states).argmax(1).cpu().numpy()
+        random_actions = self._rng.integers(self.num_actions, size=len(greedy_actions))
+        explore = self._rng.random(len(greedy_actions)) < self.epsilon
+        return np.where(explore, random_actions, greedy_actions)
+
     def store_transition(self, data):
         self.memory.push(data)
         self.memory_counter += 1
 
+    def store_transitions(self, states, actions, rewards, next_states, dones):
+        self.memory.push_batch(states, actions, rewards, next_states, dones)
+        self.memory_counter += len(actions)
+
     def update_epsilon(self):
         if self.epsilon > self.epsilon_min:
             self.epsilon -= (1.0 - self.epsilon_min) / self.epsilon_decay
@@ -67,8 +107,63 @@ class BaseDQN:
         torch.save(self.eval_net.state_dict(), path)
 
     def load_model(self, path):
-        self.eval_net.load_state_dict(torch.load(path, map_location=self.device))
+        self.eval_net.load_state_dict(torch.load(path, map_location=self.device, mmap=True, weights_only=True))
         self.target_net.load_state_dict(self.eval_net.state_dict())
 
+    def to_device(self, tensor):
+        """Move a host tensor to the agent's device, pinning it first when the device is a GPU."""
+        if self.pin_memory:
+            return tensor.pin_memory().to(self.device, non_blocking=True)
+        return tensor.to(self.device)
+
+    def sample_batch(self):
+        """Sample a minibatch and stack it into batched tensors on the agent's device."""
+        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
+
+        # Fancy indexing already yields fresh contiguous arrays, so from_numpy shares their memory
+        states = self.to_device(torch.from_numpy(states))
+        actions = self.to_device(torch.from_numpy(actions)).unsqueeze(1)
+        rewards = self.to_device(torch.from_numpy(rewards)).unsqueeze(1)
+        next_states = self.to_device(torch.from_numpy(next_states))
+        dones = self.to_device(torch.from_numpy(dones)).float().unsqueeze(1)
+
+        return states, actions, rewards, next_states, dones
+
+    def td_target(self, rewards, q_next, dones):
+        """One-step TD target, computed by the Numba kernel when the eager batch lives on the CPU."""
+        if self.use_numba_targets:
+            targets = compute_targets(
+                rewards.numpy().ravel(),
+                q_next.numpy().ravel(),
+                dones.numpy().ravel(),
+                np.float32(self.gamma)
+            )
+            return torch.from_numpy(targets).view_as(rewards)
+        return rewards + self.gamma * q_next * (1 - dones)
+
+    def _train_step(self, states, actions, rewards, next_states, dones):
+        """Compute the TD loss for a minibatch."""
+        raise NotImplementedError("The _train_step method must be implemented by subclasses")
+
     def learn(self):
-        raise NotImplementedError("The learn method must be implemented by subclasses")
+        if self.learn_step_counter % self.target_update == 0:
+            self.target_net.load_state_dict(self.eval_net.state_dict())
+
+        if len(self.memory) < self.batch_size:
+            return
+
+        # Sample a minibatch as stacked tensors
+        states, actions, rewards, next_states, dones = self.sample_batch()
+
+        # Compute loss
+        loss = self._train_step(states, actions, rewards, next_states, dones)
+
+        # Optimize the model
+        self.optimizer.zero_grad(set_to_none=True)
+        loss.backward()
+        self.optimizer.step()
+
+        # Update epsilon
+        self.update_epsilon()
+
+        self.learn_step_counter += 1
@@ -6,42 +6,16 @@ from models import DuelingDQNNetwork
 from data import Data
 
 class DuelingDQN(BaseDQN):
-    def __init__(self, num_states, num_actions):
-        super(DuelingDQN, self).__init__(num_states, num_actions, DuelingDQNNetwork)
-
-    def learn(self):
-        if self.learn_step_counter % self.target_update == 0:
-            self.target_net.load_state_dict(self.eval_net.state_dict())
-
-        if len(self.memory) < self.batch_size:
-            return
-
-        batch = self.memory.sample(self.batch_size)
-
-        # Extract components from the batch
-        states = torch.tensor([d.state for d in batch], dtype=torch.float).to(self.device)
-        actions = torch.tensor([d.action for d in batch], dtype=torch.long).unsqueeze(1).to(self.device)
-        rewards = torch.tensor([d.reward for d in batch], dtype=torch.float).unsqueeze(1).to(self.device)
-        next_states = torch.tensor([d.next_state for d in batch], dtype=torch.float).to(self.device)
-        dones = torch.tensor([d.done for d in batch], dtype=torch.float).unsqueeze(1).to(self.device)
+    def __init__(self, num_states, num_actions, **kwargs):
+        super(DuelingDQN, self).__init__(num_states, num_actions, DuelingDQNNetwork, **kwargs)
 
+    def _train_step(self, states, actions, rewards, next_states, dones):
         # Current Q values
         q_eval = self.eval_net(states).gather(1, actions)
 
         # Compute target Q values
         with torch.no_grad():
             q_next = self.target_net(next_states).max(1)[0].unsqueeze(1)
-            q_target = rewards + self.gamma * q_next * (1 - dones)
-
-        # Compute loss
-        loss = self.loss_func(q_eval, q_target)
-
-        # Optimize the model
-        self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
-
-        # Update epsilon
-        self.update_epsilon()
+            q_target = self.td_target(rewards, q_next, dones)
 
-        self.learn_step_counter += 1
+        return self.loss_func(q_eval, q_target)
@@ -4,11 +4,14 @@ import os
 import torch
 import gymnasium as gym
 import argparse
+import numpy as np
+from functools import partial
 from dqn import DQN
 from double_dqn import DoubleDQN
 from dueling_dqn import DuelingDQN
 from data import Data
 from utils.logger import setup_logger
+from utils.reward_window import RewardWindow
 from utils.video_recorder import record_video
 
 # Hyperparameters
@@ -19,6 +22,7 @@ GAMMA = 0.98
 SAVING_ITERATION = 1000
 MEMORY_CAPACITY = 10000
 MIN_CAPACITY = 500
+TRAIN_FREQ = 1  # Environment steps between gradient updates
 TARGET_UPDATE = 10
 EPSILON_MIN = 0.01
 EPSILON_DECAY = 1000
@@ -28,33 +32,116 @@ def set_seed(env, seed=SEED):
     env.reset(seed=seed)
     env.action_space.seed(seed)
     torch.manual_seed(seed)
-    import numpy as np
     import random
     np.random.seed(seed)
     random.seed(seed)
 
-def get_agent(algorithm, num_states, num_actions):
+def get_agent(algorithm, num_states, num_actions, use_compile=False):
     if algorithm == 'DQN':
-        return DQN(num_states, num_actions)
+        return DQN(num_states, num_actions, use_compile=use_compile)
     elif algorithm == 'DoubleDQN':
-        return DoubleDQN(num_states, num_actions)
+        return DoubleDQN(num_states, num_actions, use_compile=use_compile)
     elif algorithm == 'DuelingDQN':
-        return DuelingDQN(num_states, num_actions)
+        return DuelingDQN(num_states, num_actions, use_compile=use_compile)
     else:
         raise ValueError(f"Unknown algorithm: {algorithm}")
 
+def make_env(env_name):
+    if env_name == 'LunarLander-v3':
+        return gym.make("LunarLander-v3", continuous=False)
+    return gym.make(env_name)
+
+def end_episode(args, agent, episode, ep_reward, best_reward, reward_window, save_dir, logger):
+    """Log a finished episode and save checkpoints; returns the updated best reward."""
+    reward_window.append(ep_reward)
+    
+    # Logging
+    logger.info(f"Episode: {episode}, Reward: {ep_reward}, Epsilon: {agent.epsilon:.4f}")
+    
+    # Save the best model
+    if ep_reward > best_reward:
+        best_reward = ep_reward
+        torch.save(agent.eval_net.state_dict(), f"{save_dir}/best.pth")
+        logger.info(f"New best reward: {best_reward} at episode {episode}")
+    
+    # Periodic checkpoint saving
+    if episode % SAVING_ITERATION == 0:
+        torch.save(agent.eval_net.state_dict(), f"{save_dir}/{episode}.pth")
+        logger.info(f"Model saved at episode {episode}")
+    
+    # Print progress every 100 episodes
+    if episode % 100 == 0:
+        print(f"Algorithm: {args.algorithm}, Environment: {args.environment}, Episode: {episode}, Reward: {ep_reward}, Avg Reward (last 100): {reward_window.mean():.2f}, Epsilon: {agent.epsilon:.4f}")
+    
+    return best_reward
+
+def train(args, env, agent, save_dir, logger):
+    best_reward = -float('inf')
+    reward_window = RewardWindow(size=100)
+    total_steps = 0
+    for episode in range(1, EPISODES + 1):
+        state, info = env.reset()
+        ep_reward = 0
+        done = False
+        
+        while not done:
+            action = agent.choose_action(state)
+            next_state, reward, done, truncated, info = env.step(action)
+            agent.store_transition(Data(state, action, reward, next_state, done))
+            ep_reward += reward
+            state = next_state
+            total_steps += 1
+            
+            if agent.memory_counter >= MIN_CAPACITY and total_steps % TRAIN_FREQ == 0:
+                agent.learn()
+        
+        best_reward = end_episode(args, agent, episode, ep_reward, best_reward, reward_window, save_dir, logger)
+
+def train_vectorized(args, agent, save_dir, logger):
+    """Train on args.num_envs parallel environments, one batched action selection per step."""
+    envs = gym.vector.AsyncVectorEnv([partial(make_env, args.environment) for _ in range(args.num_envs)])
+    states, info = envs.reset(seed=SEED)
+    ep_rewards = np.zeros(args.num_envs)
+    # Sub-environments that finished last step are reset by this step, which carries no transition
+    autoreset = np.zeros(args.num_envs, dtype=bool)
+    best_reward = -float('inf')
+    reward_window = RewardWindow(size=100)
+    total_steps = 0
+    episode = 0
+    
+    while episode < EPISODES:
+        actions = agent.choose_actions(states)
+        next_states, rewards, terminated, truncated, info = envs.step(actions)
+        valid = ~autoreset
+        agent.store_transitions(states[valid], actions[valid], rewards[valid], next_states[valid], terminated[valid])
+        ep_rewards += rewards
+        states = next_states
+        total_steps += 1
+        
+        if agent.memory_counter >= MIN_CAPACITY and total_steps % TRAIN_FREQ == 0:
+            agent.learn()
+        
+        autoreset = terminated | truncated
+        for i in np.flatnonzero(autoreset):
+            episode += 1
+            best_reward = end_episode(args, agent, episode, ep_rewards[i], best_reward, reward_window, save_dir, logger)
+            ep_rewards[i] = 0
+            if episode == EPISODES:
+                break
+    
+    envs.close()
+
 def main():
     parser = argparse.ArgumentParser(description='DQN, Double DQN, and Dueling DQN across Environments')
     parser.add_argument('--algorithm', type=str, required=True, choices=['DQN', 'DoubleDQN', 'DuelingDQN'], help='Algorithm to use')
     parser.add_argument('--environment', type=str, required=True, choices=['CartPole-v1', 'MountainCar-v0', 'LunarLander-v3'], help='Gym environment name')
     parser.add_argument('--test', action='store_true', help='Set to test the agent instead of training')
+    parser.add_argument('--compile', action='store_true', help='Compile the batched training step with torch.compile')
+    parser.add_argument('--num-envs', type=int, default=1, help='Number of parallel environments used for training')
     args = parser.parse_args()
     
     # Initialize environment
-    if args.environment == 'LunarLander-v3':
-        env = gym.make("LunarLander-v3", continuous=False)
-    else:
-        env = gym.make(args.environment)
+    env = make_env(args.environment)
     
     set_seed(env, SEED)
     
@@ -62,7 +149,7 @@ def main():
     num_states = env.observation_space.shape[0]
     
     # Initialize agent
-    agent = get_agent(args.algorithm, num_states, num_actions)
+    agent = get_agent(args.algorithm, num_states, num_actions, use_compile=args.compile)
     
     # Setup directories
     save_dir = f"./results/weights/{args.algorithm}/{args.environment}/"
@@ -75,8 +162,6 @@ def main():
     log_path = f"./results/weights/{args.algorithm}/{args.environment}/training.log"
     logger = setup_logger(log_path)
     
-    best_reward = -float('inf')
-    
     if args.test:
         # Load the best model
         model_path = f"{save_dir}/best.pth"
@@ -92,38 +177,10 @@ def main():
         return
     
     # Training loop
-    for episode in range(1, EPISODES + 1):
-        state, info = env.reset()
-        ep_reward = 0
-        done = False
-        
-        while not done:
-            action = agent.choose_action(state)
-            next_state, reward, done, truncated, info = env.step(action)
-            agent.store_transition(Data(state, action, reward, next_state, done))
-            ep_reward += reward
-            state = next_state
-            
-            if agent.memory_counter >= MIN_CAPACITY:
-                agent.learn()
-        
-        # Logging
-        logger.info(f"Episode: {episode}, Reward: {ep_reward}, Epsilon: {agent.epsilon:.4f}")
-        
-        # Save the best model
-        if ep_reward > best_reward:
-            best_reward = ep_reward
-            torch.save(agent.eval_net.state_dict(), f"{save_dir}/best.pth")
-            logger.info(f"New best reward: {best_reward} at episode {episode}")
-        
-        # Periodic checkpoint saving
-        if episode % SAVING_ITERATION == 0:
-            torch.save(agent.eval_net.state_dict(), f"{save_dir}/{episode}.pth")
-            logger.info(f"Model saved at episode {episode}")
-        
-        # Print progress every 100 episodes
-        if episode % 100 == 0:
-            print(f"Algorithm: {args.algorithm}, Environment: {args.environment}, Episode: {episode}, Reward: {ep_reward}, Epsilon: {agent.epsilon:.4f}")
+    if args.num_envs > 1:
+        train_vectorized(args, agent, save_dir, logger)
+    else:
+        train(args, env, agent, save_dir, logger)
     
     env.close()
     
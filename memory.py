@@ -1,21 +1,51 @@
 # memory.py
 
-import random
-import collections
+import numpy as np
+
+class ReplayBuffer:
+    """Experience Replay Buffer backed by preallocated NumPy arrays (ring buffer)"""
+
+    def __init__(self, capacity, state_size):
+        self.capacity = capacity
+        self.states = np.empty((capacity, state_size), dtype=np.float32)
+        self.actions = np.empty(capacity, dtype=np.int64)
+        self.rewards = np.empty(capacity, dtype=np.float32)
+        self.next_states = np.empty((capacity, state_size), dtype=np.float32)
+        self.dones = np.empty(capacity, dtype=np.bool_)
+        self.pos = 0
+        self.full = False
 
-class Memory:
-    """Experience Replay Buffer"""
-    
-    def __init__(self, capacity):
-        self.buffer = collections.deque(maxlen=capacity)
-    
     def push(self, data):
-        """Add a transition to the buffer."""
-        self.buffer.append(data)
-    
+        """Write a transition in place, overwriting the oldest one once full."""
+        self.states[self.pos] = data.state
+        self.actions[self.pos] = data.action
+        self.rewards[self.pos] = data.reward
+        self.next_states[self.pos] = data.next_state
+        self.dones[self.pos] = data.done
+        self.pos = (self.pos + 1) % self.capacity
+        self.full = self.full or self.pos == 0
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        """Write a batch of transitions in place, wrapping around the end of the buffer."""
+        idx = (self.pos + np.arange(len(actions))) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.full = self.full or self.pos + len(actions) >= self.capacity
+        self.pos = (self.pos + len(actions)) % self.capacity
+
     def sample(self, batch_size):
-        """Sample a batch of transitions."""
-        return random.sample(self.buffer, batch_size)
-    
+        """Sample a batch of transitions as contiguous arrays."""
+        idx = np.random.randint(0, len(self), batch_size)
+        return (
+            self.states[idx],
+            self.actions[idx],
+            self.rewards[idx],
+            self.next_states[idx],
+            self.dones[idx],
+        )
+
     def __len__(self):
-        return len(self.buffer)
+        return self.capacity if self.full else self.pos
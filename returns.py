@@ -0,0 +1,14 @@
+# returns.py
+
+import numba
+import numpy as np
+
+# Compiled eagerly at import from the explicit signature, so the first training step
+# pays no JIT latency; cache=True reuses the machine code across runs.
+@numba.njit("float32[:](float32[:], float32[:], float32[:], float32)", cache=True, fastmath=True)
+def compute_targets(rewards, next_q, dones, gamma):
+    """One-step TD targets: reward plus discounted next-state value for non-terminal transitions."""
+    targets = np.empty_like(rewards)
+    for i in range(rewards.shape[0]):
+        targets[i] = rewards[i] + gamma * next_q[i] * (1.0 - dones[i])
+    return targets
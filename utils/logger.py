@@ -1,9 +1,10 @@
 # utils/logger.py
 
 import logging
+import logging.handlers
 import os
 
-def setup_logger(log_path):
+def setup_logger(log_path, buffer_capacity=100):
     """Set up the logger."""
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
@@ -16,7 +17,15 @@ def setup_logger(log_path):
     formatter = logging.Formatter('%(asctime)s - %(message)s')
     handler.setFormatter(formatter)
     
+    # FileHandler flushes on every record; buffer records and write them in bulk instead.
+    # The buffer is flushed when full, on errors, and when logging shuts down at exit.
+    buffered_handler = logging.handlers.MemoryHandler(
+        capacity=buffer_capacity,
+        flushLevel=logging.ERROR,
+        target=handler
+    )
+    
     # Add handler to logger
-    logger.addHandler(handler)
+    logger.addHandler(buffered_handler)
     
     return logger
@@ -0,0 +1,20 @@
+# utils/reward_window.py
+
+import collections
+
+class RewardWindow:
+    """Running mean over the most recent episode rewards."""
+
+    def __init__(self, size=100):
+        self.window = collections.deque(maxlen=size)
+        self.window_sum = 0.0
+
+    def append(self, reward):
+        """Add a reward, dropping the oldest one from the running sum once the window is full."""
+        if len(self.window) == self.window.maxlen:
+            self.window_sum -= self.window[0]
+        self.window.append(reward)
+        self.window_sum += reward
+
+    def mean(self):
+        return self.window_sum / len(self.window)
@@ -1,7 +1,6 @@
 # utils/video_recorder.py
 
 import gymnasium as gym
-import imageio
 
 def record_video(env, agent, path, max_steps=1000):
     """Record a video of the agent's performance."""
@@ -21,6 +20,7 @@ def record_video(env, agent, path, max_steps=1000):
         step += 1
     env.close()
     
-    # Save frames as video
+    # Save frames as video; imageio is imported here so it only loads once a recording is written
+    import imageio
     imageio.mimsave(path, frames, fps=30)
     print(f"Video saved to {path} with reward {ep_reward}")